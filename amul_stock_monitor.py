@@ -1,21 +1,42 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
 import smtplib
+import atexit
 from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import time
+import random
 import logging
 import os
 import json
+import asyncio
+import re
+import threading
+import functools
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from urllib.parse import urlparse
 from email.header import Header
 from email.utils import formataddr
+# Selenium and lxml are imported where they are used, so runs that never
+# need them (e.g. SINGLE_CHECK with only HTTP products) don't pay for them
+
+_ALERT_SELECTOR = 'div.alert.alert-danger.mt-3'
+_SOLD_OUT_RX = re.compile(rb'sold\s*out', re.I)
+_SOLD_OUT_TEXT_RX = re.compile(r'sold\s*out', re.I)
+# Sold-out alert as it appears in the raw page, used to stop downloading early
+_SOLD_OUT_ALERT_RX = re.compile(rb'alert-danger[^<]{0,200}sold\s*out', re.I)
+# Stock alerts sit near the top of the page; never read more than this
+_MAX_PAGE_BYTES = 256 * 1024
+
+@functools.lru_cache(maxsize=None)
+def _alert_css():
+    """Compiled CSS selector for the sold-out alert, built on first use"""
+    from lxml.cssselect import CSSSelector
+    return CSSSelector(_ALERT_SELECTOR)
+
 
 class StockMonitor:
     def __init__(self, config_file='config.json'):
@@ -23,6 +44,33 @@ class StockMonitor:
         self.config = self.load_config(config_file)
         self.setup_logging()
         self.driver = None
+        # Selenium checks served by the current driver; it is recycled periodically
+        # so Chromium releases the renderer memory it accumulates over long runs
+        self._selenium_iters = 0
+        self._max_selenium_iters = self.config.get('max_selenium_checks', 50)
+        self.session = self.setup_session()
+        # Last seen stock status and conditional GET cache survive restarts via the state file
+        self.state_file = os.path.expanduser(
+            os.getenv("STATE_FILE", os.path.join("~", ".cache", "stock_monitor", "state.json"))
+        )
+        # product name -> last known is_in_stock;
+        # url -> (etag, last_modified, is_in_stock, message) for conditional GETs
+        self.last_status, self._http_cache = self.load_state()
+        self._http_version_logged = False
+        # host -> semaphore bounding concurrent requests-based checks per host
+        self._host_semaphores = {}
+        self._host_lock = threading.Lock()
+        # host -> asyncio.Semaphore, the event-loop counterpart of _host_semaphores
+        self._async_host_semaphores = {}
+        # host -> time the most recent check against it was scheduled to start
+        self._last_host_hit = {}
+        # Notification channels are kept open/pooled across alerts
+        self._smtp = None
+        self._notify_executor = ThreadPoolExecutor(max_workers=4)
+        # (product_name, product_url, message) alerts raised during the current cycle
+        self._pending_alerts = []
+        atexit.register(self.close_smtp)
+        self.setup_email_templates()
     
     def load_config(self, config_file):
         """Load configuration from JSON file or environment variables"""
@@ -44,6 +92,30 @@ class StockMonitor:
                 "user_agent": os.getenv("USER_AGENT", "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
             }
     
+    def load_state(self):
+        """Load last stock status and HTTP cache from the state file, if present"""
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            http_cache = {url: tuple(entry) for url, entry in state.get('http_cache', {}).items()}
+            return state.get('last_status', {}), http_cache
+        except FileNotFoundError:
+            return {}, {}
+        except (ValueError, TypeError, AttributeError) as e:
+            self.logger.warning(f"Ignoring unreadable state file {self.state_file}: {str(e)}")
+            return {}, {}
+
+    def save_state(self):
+        """Atomically write last stock status and HTTP cache to the state file"""
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump({'last_status': self.last_status, 'http_cache': self._http_cache}, f)
+            os.replace(tmp_file, self.state_file)
+        except OSError as e:
+            self.logger.error(f"Failed to save state to {self.state_file}: {str(e)}")
+
     def setup_logging(self):
         """Setup logging configuration"""
         logging.basicConfig(
@@ -55,27 +127,62 @@ class StockMonitor:
         )
         self.logger = logging.getLogger(__name__)
     
+    def setup_email_templates(self):
+        """Precompute the parts of alert emails that don't change between alerts"""
+        sender_email = self.config.get('email', {}).get('sender_email')
+        self._from_header = formataddr((str(Header('Stock Bot', 'utf-8')), sender_email)) if sender_email else None
+        self._body_template = (
+            "✅ The product '{name}' is now available!\n\n"
+            "🛒 Product URL: {url}\n"
+            "📦 Status: {message}\n"
+            "⏰ Checked at: {ts}\n\n"
+            "Visit the URL to buy it now.\n"
+        )
+
+    def setup_session(self):
+        """Setup a shared HTTP session so connections are kept alive between checks"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=16,
+            max_retries=Retry(total=2, backoff_factor=0.3)
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'User-Agent': self.config['user_agent'],
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            # Includes br when a brotli package is installed for urllib3 to decode it
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive',
+        })
+        return session
+
     def setup_selenium_driver(self):
         """Setup Selenium WebDriver for cloud environment"""
         if self.driver:
             return self.driver
             
+        driver = None
         try:
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
+
             chrome_options = Options()
+            # Return from driver.get() at DOMContentLoaded instead of the full load event
+            chrome_options.page_load_strategy = 'eager'
             chrome_options.add_argument('--headless')
             chrome_options.add_argument('--no-sandbox')
             chrome_options.add_argument('--disable-dev-shm-usage')
             chrome_options.add_argument('--disable-gpu')
             chrome_options.add_argument('--disable-extensions')
             chrome_options.add_argument('--disable-plugins')
-            chrome_options.add_argument('--disable-images')
-            chrome_options.add_argument('--disable-javascript')
             chrome_options.add_argument('--window-size=1920,1080')
             chrome_options.add_argument(f'--user-agent={self.config["user_agent"]}')
             
             # Cloud-specific options
             chrome_options.add_argument('--remote-debugging-port=9222')
-            chrome_options.add_argument('--single-process')
             chrome_options.add_argument('--disable-web-security')
             chrome_options.add_argument('--allow-running-insecure-content')
             
@@ -84,16 +191,65 @@ class StockMonitor:
             if os.path.exists(chrome_binary):
                 chrome_options.binary_location = chrome_binary
             
-            self.driver = webdriver.Chrome(options=chrome_options)
+            driver = webdriver.Chrome(options=chrome_options)
+            self.enlarge_driver_connection_pool(driver)
+
+            # Block static assets and trackers at the network layer. Stylesheets are
+            # kept: the pincode modal's visibility checks depend on them
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': [
+                '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg',
+                '*.woff', '*.woff2', '*.ttf',
+                '*googletagmanager*', '*google-analytics*', '*doubleclick*', '*facebook*',
+            ]})
+
+            # Only keep the driver once it is fully set up
+            self.driver = driver
             self.logger.info("Selenium driver setup successful")
             return self.driver
             
         except Exception as e:
             self.logger.error(f"Failed to setup Selenium driver: {str(e)}")
+            if driver:
+                # Don't leave a half-configured browser running
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
             return None
     
+    def enlarge_driver_connection_pool(self, driver, maxsize=10):
+        """Let WebDriver commands to chromedriver use more than one pooled connection"""
+        # webdriver.Chrome doesn't take a ClientConfig, so the command executor is
+        # swapped for one built with a larger urllib3 pool against the same service
+        try:
+            from selenium.webdriver.chrome.remote_connection import ChromeRemoteConnection
+            from selenium.webdriver.remote.client_config import ClientConfig
+
+            server_addr = driver.service.service_url
+            client_config = ClientConfig(
+                remote_server_addr=server_addr,
+                keep_alive=True,
+                timeout=120,
+                # Selenium reads the pool manager arguments from this nested key
+                init_args_for_pool_manager={'init_args_for_pool_manager': {'maxsize': maxsize, 'block': False}}
+            )
+            executor = ChromeRemoteConnection(remote_server_addr=server_addr, client_config=client_config)
+        except (ImportError, TypeError) as e:
+            self.logger.info(f"Keeping default WebDriver connection pool: {str(e)}")
+            return
+
+        previous_executor, driver.command_executor = driver.command_executor, executor
+        previous_executor.close()
+
     def handle_pincode_modal(self, product):
         """Handle pincode/location modal if present and active"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
         try:
             pincode = product.get('pincode')
             selectors = product.get('pincode_selectors', {})
@@ -128,14 +284,11 @@ class StockMonitor:
             self.logger.info(f"Entered pincode: {pincode}")
 
             # Select matching pincode from dropdown
-            try:
-                dropdown_xpath = f"//p[contains(@class, 'item-name') and text()='{pincode}']"
-                matching_item = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, dropdown_xpath))
-                )
+            matching_item = self.find_pincode_option(pincode)
+            if matching_item:
                 matching_item.click()
                 self.logger.info(f"Selected matching pincode from dropdown: {pincode}")
-            except TimeoutException:
+            else:
                 self.logger.warning(f"Dropdown with pincode {pincode} not found. Trying to proceed without it.")
 
             # Submit
@@ -145,7 +298,6 @@ class StockMonitor:
                 submit_button.click()
                 self.logger.info("Clicked submit button")
             except NoSuchElementException:
-                from selenium.webdriver.common.keys import Keys
                 pincode_input.send_keys(Keys.RETURN)
                 self.logger.info("Pressed Enter on pincode input")
 
@@ -162,17 +314,219 @@ class StockMonitor:
             self.logger.error(f"Failed to handle pincode modal: {str(e)}")
             return False
     
+    def find_pincode_option(self, pincode, timeout=5):
+        """Poll for the visible dropdown entry matching the pincode, or None on timeout"""
+        # One querySelectorAll per poll instead of re-evaluating an XPath in the driver
+        script = (
+            "return Array.from(document.querySelectorAll('p.item-name')).find("
+            "e => e.textContent.trim() === arguments[0] && e.offsetParent !== null) || null;"
+        )
+        deadline = time.monotonic() + timeout
+        delay = 0.1
+        while True:
+            matching_item = self.driver.execute_script(script, str(pincode))
+            if matching_item or time.monotonic() >= deadline:
+                return matching_item
+            time.sleep(min(delay, max(0, deadline - time.monotonic())))
+            delay = min(delay * 2, 1.0)
+
+    def uses_selenium(self, product):
+        """Whether a product needs the browser, i.e. it has no API endpoint or forces Selenium"""
+        if product.get('force_selenium', False):
+            return True
+        return product.get('use_selenium', False) and not product.get('api_url')
+
     def check_stock_status(self, product):
         """Check if a product is in stock"""
-        use_selenium = product.get('use_selenium', False)
-        
-        if use_selenium:
+        if self.uses_selenium(product):
             return self.check_stock_with_selenium(product)
+        elif product.get('api_url'):
+            return self.check_stock_with_api(product)
         else:
             return self.check_stock_with_requests(product)
     
+    def get_host_semaphore(self, url):
+        """Return the semaphore limiting concurrent checks against a host"""
+        host = urlparse(url).netloc
+        with self._host_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(
+                    self.config.get('max_requests_per_host', 4)
+                )
+            return self._host_semaphores[host]
+
+    def reserve_host_slot(self, url):
+        """Reserve the next start slot for a host, returning how long to wait for it"""
+        host = urlparse(url).netloc
+        min_interval = self.config.get('min_host_interval', 1.0)
+        with self._host_lock:
+            now = time.monotonic()
+            last = self._last_host_hit.get(host)
+            start = now if last is None else max(now, last + min_interval)
+            if start > now:
+                # Jitter keeps checks from lining up with server-side rate limit windows
+                start += random.uniform(0, 0.5)
+            self._last_host_hit[host] = start
+
+        return start - now
+
+    def wait_for_host(self, url):
+        """Sleep only as long as needed to keep checks on a host min_host_interval apart"""
+        wait = self.reserve_host_slot(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    def check_url(self, product):
+        """URL a product's check actually hits"""
+        if self.uses_selenium(product):
+            return product['url']
+        return product.get('api_url', product['url'])
+
+    def check_product(self, product):
+        """Check a single product, respecting the per-host concurrency limit and pacing"""
+        url = self.check_url(product)
+        self.wait_for_host(url)
+        self.logger.info(f"Checking {product['name']}...")
+        if self.uses_selenium(product):
+            return self.check_stock_status(product)
+        with self.get_host_semaphore(url):
+            return self.check_stock_status(product)
+
+    def endpoint_key(self, product):
+        """Identify what a check actually fetches, so products sharing it are checked once"""
+        if self.uses_selenium(product):
+            return ('selenium', product['url'], product.get('pincode'))
+        if product.get('api_url'):
+            return ('api', product['api_url'], json.dumps(product.get('api_payload'), sort_keys=True))
+        return ('http', product['url'])
+
+    def check_products(self, products):
+        """Check all products, returning (product, is_in_stock, message) in config order"""
+        # Shared endpoints are checked once; Selenium checks share one driver and run serially
+        # endpoint key -> (is_in_stock, message), valid for this cycle only
+        cycle_cache = {}
+        first_products = self.group_by_endpoint(products)
+
+        requests_keys = [k for k, p in first_products.items() if not self.uses_selenium(p)]
+        selenium_keys = [k for k, p in first_products.items() if self.uses_selenium(p)]
+
+        if requests_keys:
+            with ThreadPoolExecutor(max_workers=min(16, len(requests_keys))) as executor:
+                futures = {executor.submit(self.check_product, first_products[k]): k for k in requests_keys}
+                for future in as_completed(futures):
+                    key = futures[future]
+                    try:
+                        cycle_cache[key] = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Error checking {first_products[key]['name']}: {str(e)}")
+                        cycle_cache[key] = (None, f"Error: {str(e)}")
+
+        selenium_results = self.check_products_serially([first_products[k] for k in selenium_keys])
+        cycle_cache.update(zip(selenium_keys, selenium_results))
+
+        return [(product,) + cycle_cache[self.endpoint_key(product)] for product in products]
+
+    def group_by_endpoint(self, products):
+        """Map each distinct endpoint key to the first product using it"""
+        first_products = {}
+        for product in products:
+            first_products.setdefault(self.endpoint_key(product), product)
+        return first_products
+
+    def check_products_serially(self, products):
+        """Check products one after another, as Selenium checks share one driver"""
+        return [self.check_product(product) for product in products]
+
+    async def check_products_async(self, products, client):
+        """Async counterpart of check_products; Selenium checks run in a worker thread"""
+        first_products = self.group_by_endpoint(products)
+        http_keys = [k for k, p in first_products.items() if not self.uses_selenium(p)]
+        selenium_keys = [k for k, p in first_products.items() if self.uses_selenium(p)]
+
+        selenium_task = asyncio.to_thread(self.check_products_serially, [first_products[k] for k in selenium_keys])
+        *http_results, selenium_results = await asyncio.gather(
+            *[self._check_product_async(first_products[k], client) for k in http_keys],
+            selenium_task
+        )
+
+        cycle_cache = dict(zip(http_keys, http_results))
+        cycle_cache.update(zip(selenium_keys, selenium_results))
+        return [(product,) + cycle_cache[self.endpoint_key(product)] for product in products]
+
+    def get_async_host_semaphore(self, url):
+        """Return the asyncio semaphore limiting concurrent checks against a host"""
+        host = urlparse(url).netloc
+        if host not in self._async_host_semaphores:
+            self._async_host_semaphores[host] = asyncio.Semaphore(
+                self.config.get('max_requests_per_host', 4)
+            )
+        return self._async_host_semaphores[host]
+
+    async def _check_product_async(self, product, client):
+        """Check a single HTTP or API product on the event loop, respecting host limits and pacing"""
+        url = self.check_url(product)
+        wait = self.reserve_host_slot(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self.logger.info(f"Checking {product['name']}...")
+        async with self.get_async_host_semaphore(url):
+            return await self._check_http_async(product, client)
+
+    async def _check_http_async(self, product, client):
+        """Async counterpart of check_stock_with_requests and check_stock_with_api"""
+        import httpx
+
+        try:
+            if product.get('api_url'):
+                payload = product.get('api_payload')
+                response = await client.request(
+                    'POST' if payload is not None else 'GET',
+                    product['api_url'],
+                    json=payload,
+                    headers={'Accept': 'application/json'}
+                )
+                response.raise_for_status()
+                return self.parse_api_stock(response.json())
+
+            url = product['url']
+            headers, cached = self.conditional_headers(url)
+            async with client.stream('GET', url, headers=headers) as response:
+                # Page unchanged since last check, reuse the previous verdict
+                if response.status_code == 304 and cached:
+                    return cached[2], cached[3]
+
+                response.raise_for_status()
+                if not self._http_version_logged:
+                    self.logger.info(f"Negotiated {response.http_version} with {response.url.host}")
+                    self._http_version_logged = True
+
+                buf = bytearray()
+                result = None
+                async for chunk in response.aiter_bytes(8192):
+                    result = self.feed_page_chunk(buf, chunk)
+                    if result:
+                        break
+                if result is None:
+                    result = self.parse_page_alert(buf)
+
+                self.remember_validators(url, response.headers, result)
+
+            return result
+
+        except httpx.HTTPError as e:
+            self.logger.error(f"Request failed for {product['name']}: {str(e)}")
+            return None, f"Request failed: {str(e)}"
+        except Exception as e:
+            self.logger.error(f"Error checking {product['name']}: {str(e)}")
+            return None, f"Error: {str(e)}"
+
     def check_stock_with_selenium(self, product):
         """Check stock status using Selenium for JavaScript-heavy sites"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+
         try:
             if not self.driver:
                 self.driver = self.setup_selenium_driver()
@@ -185,19 +539,29 @@ class StockMonitor:
             if not self.handle_pincode_modal(product):
                 return None, "Failed to handle pincode modal"
 
-            # Wait for page to fully load
-            WebDriverWait(self.driver, 15).until(
-                lambda driver: driver.execute_script("return document.readyState") == "complete"
-            )
-
-            # Look for out-of-stock alert
+            # Wait until the sold-out alert or the page's main content is in the DOM.
+            # The alert is part of the served HTML (the requests path finds it there),
+            # so it is present as soon as the main content is
+            content_selector = product.get('content_selector', 'main')
             try:
-                alert_element = self.driver.find_element(By.CSS_SELECTOR, 'div.alert.alert-danger')
-                if 'sold out' in alert_element.text.lower():
-                    return False, "Explicit 'Sold Out' alert found"
-            except NoSuchElementException:
+                WebDriverWait(self.driver, 5).until(EC.any_of(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, 'div.alert.alert-danger')),
+                    EC.presence_of_element_located((By.CSS_SELECTOR, content_selector))
+                ))
+            except TimeoutException:
+                self.logger.warning(f"Stock markers not found for {product['name']}")
+                return None, "Stock markers not found"
+
+            # Look for out-of-stock alert in a single round-trip; null when absent
+            alert_text = self.driver.execute_script(
+                "var a = document.querySelector('div.alert.alert-danger');"
+                "return a ? a.innerText : null;"
+            )
+            if alert_text is None:
                 # No sold-out alert found — assume in stock
                 return True, "No 'Sold Out' alert — assuming product is in stock"
+            if _SOLD_OUT_TEXT_RX.search(alert_text):
+                return False, "Explicit 'Sold Out' alert found"
 
             # Safety fallback
             return False, "Unable to determine stock status from alert element"
@@ -205,29 +569,42 @@ class StockMonitor:
         except Exception as e:
             self.logger.error(f"Selenium check failed for {product['name']}: {str(e)}")
             return None, f"Selenium error: {str(e)}"
+        finally:
+            self.recycle_selenium_driver()
+
+    def recycle_selenium_driver(self):
+        """Quit the driver once it has served enough checks; the next check starts a fresh one"""
+        if not self.driver:
+            return
+
+        self._selenium_iters += 1
+        if self._selenium_iters < self._max_selenium_iters:
+            return
+
+        try:
+            self.driver.quit()
+            self.logger.info(f"Recycled browser after {self._selenium_iters} checks")
+        except Exception as e:
+            self.logger.warning(f"Failed to quit browser while recycling: {str(e)}")
+        self.driver = None
+        self._selenium_iters = 0
 
     def check_stock_with_requests(self, product):
         """Check stock status using requests for simple/static pages"""
         try:
-            headers = {
-                'User-Agent': self.config['user_agent'],
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-            }
-
-            response = requests.get(product['url'], headers=headers, timeout=10)
-            response.raise_for_status()
+            url = product['url']
+            headers, cached = self.conditional_headers(url)
 
-            soup = BeautifulSoup(response.content, 'html.parser')
+            with self.session.get(url, headers=headers, timeout=(3, 7), stream=True) as response:
+                # Page unchanged since last check, reuse the previous verdict
+                if response.status_code == 304 and cached:
+                    return cached[2], cached[3]
 
-            # Look for the sold out alert div
-            alert_div = soup.select_one('div.alert.alert-danger.mt-3')
-            if alert_div and 'sold out' in alert_div.text.lower():
-                return False, "Explicit 'Sold Out' alert found"
+                response.raise_for_status()
+                result = self.scan_page_for_alert(response.iter_content(8192))
+                self.remember_validators(url, response.headers, result)
 
-            return True, "No 'Sold Out' alert — assuming product is in stock"
+            return result
 
         except requests.RequestException as e:
             self.logger.error(f"Request failed for {product['name']}: {str(e)}")
@@ -236,46 +613,218 @@ class StockMonitor:
             self.logger.error(f"Error checking {product['name']}: {str(e)}")
             return None, f"Error: {str(e)}"
 
+    def conditional_headers(self, url):
+        """Return (headers, cached entry) for a conditional GET of a previously seen page"""
+        headers = {}
+        cached = self._http_cache.get(url)
+        if cached:
+            etag, last_modified, _, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return headers, cached
+
+    def remember_validators(self, url, response_headers, result):
+        """Cache a page's ETag/Last-Modified along with the verdict derived from it"""
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        # An undetermined verdict must not be replayed on later 304 responses
+        if (etag or last_modified) and result[0] is not None:
+            self._http_cache[url] = (etag, last_modified) + result
+
+    def scan_page_for_alert(self, chunks):
+        """Read a streamed page until the sold-out alert is found or the body ends"""
+        buf = bytearray()
+        for chunk in chunks:
+            result = self.feed_page_chunk(buf, chunk)
+            if result:
+                return result
+
+        return self.parse_page_alert(buf)
+
+    def feed_page_chunk(self, buf, chunk):
+        """Append a chunk to buf, returning a verdict once no more of the page is needed"""
+        # Only rescan the tail that could complete a match across chunks
+        start = max(0, len(buf) - 512)
+        buf += chunk
+        if _SOLD_OUT_ALERT_RX.search(buf, start):
+            return False, "Explicit 'Sold Out' alert found"
+        if len(buf) > _MAX_PAGE_BYTES:
+            return self.parse_page_alert(buf, truncated=True)
+        return None
+
+    def parse_page_alert(self, buf, truncated=False):
+        """Decide stock status from a page the byte pattern was inconclusive on"""
+        # A truncated page can only prove the product is sold out
+        if truncated:
+            no_alert = (None, "Page too large to rule out a 'Sold Out' alert")
+        else:
+            no_alert = (True, "No 'Sold Out' alert — assuming product is in stock")
+
+        if b'alert-danger' not in buf:
+            return no_alert
+
+        import lxml.html
+
+        alerts = _alert_css()(lxml.html.fromstring(bytes(buf)))
+        if alerts and _SOLD_OUT_RX.search(lxml.html.tostring(alerts[0], method='text', encoding='utf-8', with_tail=False)):
+            return False, "Explicit 'Sold Out' alert found"
+
+        return no_alert
+
+    def check_stock_with_api(self, product):
+        """Check stock status via the product's api_url, POSTing api_payload as JSON if set"""
+        try:
+            payload = product.get('api_payload')
+            headers = {'Accept': 'application/json'}
+            if payload is not None:
+                response = self.session.post(product['api_url'], json=payload, headers=headers, timeout=(3, 7))
+            else:
+                response = self.session.get(product['api_url'], headers=headers, timeout=(3, 7))
+            response.raise_for_status()
+
+            return self.parse_api_stock(response.json())
+
+        except requests.RequestException as e:
+            self.logger.error(f"API request failed for {product['name']}: {str(e)}")
+            return None, f"API request failed: {str(e)}"
+        except Exception as e:
+            self.logger.error(f"Error checking {product['name']} via API: {str(e)}")
+            return None, f"Error: {str(e)}"
+
+    def parse_api_stock(self, data):
+        """Read the stock verdict from a JSON stock API response"""
+        if isinstance(data, dict) and isinstance(data.get('data'), list):
+            data = data['data']
+        if isinstance(data, list):
+            if not data:
+                return None, "API returned no product data"
+            data = data[0]
+
+        if 'available' in data:
+            if data['available']:
+                return True, "API reports product as available"
+            return False, "API reports product as unavailable"
+        if 'inventory_quantity' in data:
+            quantity = data['inventory_quantity'] or 0
+            if quantity > 0:
+                return True, f"API reports {quantity} in inventory"
+            return False, "API reports no inventory"
+
+        return None, "No stock field found in API response"
+
     def send_notification(self, product_name, product_url, message):
         """Send email notification with UTF-8 support"""
         try:
-            email_config = self.config['email']
+            body = self._body_template.format(
+                name=product_name,
+                url=product_url,
+                message=message,
+                ts=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            )
 
-            msg = MIMEMultipart()
-            msg['From'] = formataddr((str(Header('Stock Bot', 'utf-8')), email_config['sender_email']))
-            msg['To'] = email_config['recipient_email']
-            msg['Subject'] = str(Header(f"STOCK ALERT: {product_name} is available!", 'utf-8'))
+            self._send_email(f"STOCK ALERT: {product_name} is available!", body)
+            self.logger.info(f"Notification sent for {product_name}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Failed to send notification: {str(e)}")
+            return False
 
+    def send_digest_notification(self, alerts):
+        """Send a single email listing every product that came back in stock this cycle"""
+        try:
+            items = "".join(
+                f"✅ {product_name}\n   🛒 {product_url}\n   📦 {message}\n\n"
+                for product_name, product_url, message in alerts
+            )
             body = (
-                f"✅ The product '{product_name}' is now available!\n\n"
-                f"🛒 Product URL: {product_url}\n"
-                f"📦 Status: {message}\n"
+                f"{len(alerts)} products are now available!\n\n"
+                f"{items}"
                 f"⏰ Checked at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-                "Visit the URL to buy it now.\n"
+                "Visit the URLs to buy them now.\n"
             )
 
-            msg.attach(MIMEText(body, 'plain', 'utf-8'))
+            self._send_email(f"STOCK ALERT: {len(alerts)} products are available!", body)
+            self.logger.info(f"Digest notification sent for {len(alerts)} products")
+            return True
 
-            server = smtplib.SMTP(email_config['smtp_server'], email_config['smtp_port'])
-            server.starttls()
-            server.login(email_config['sender_email'], email_config['sender_password'])
+        except Exception as e:
+            self.logger.error(f"Failed to send digest notification: {str(e)}")
+            return False
+
+    def _send_email(self, subject, body):
+        """Send a plain-text email over the persistent SMTP connection"""
+        email_config = self.config['email']
 
-            server.sendmail(
+        msg = MIMEText(body, 'plain', 'utf-8')
+        msg['From'] = self._from_header
+        msg['To'] = email_config['recipient_email']
+        msg['Subject'] = str(Header(subject, 'utf-8'))
+
+        try:
+            self._get_smtp().sendmail(
+                email_config['sender_email'],
+                email_config['recipient_email'],
+                msg.as_string()
+            )
+        except smtplib.SMTPServerDisconnected:
+            # Server dropped the idle connection; reconnect once and retry
+            self._smtp = None
+            self._get_smtp().sendmail(
                 email_config['sender_email'],
                 email_config['recipient_email'],
                 msg.as_string()
             )
 
-            server.quit()
-            self.logger.info(f"Notification sent for {product_name}")
-            return True
+    def _get_smtp(self):
+        """Return a logged-in SMTP connection, opening it on first use"""
+        if self._smtp is None:
+            email_config = self.config['email']
+            server = smtplib.SMTP(email_config['smtp_server'], email_config['smtp_port'])
+            server.starttls()
+            server.login(email_config['sender_email'], email_config['sender_password'])
+            self._smtp = server
+        return self._smtp
 
-        except Exception as e:
-            self.logger.error(f"Failed to send notification: {str(e)}")
-            return False
+    def close_smtp(self):
+        """Close the persistent SMTP connection if one is open"""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except smtplib.SMTPException:
+            pass
+        self._smtp = None
 
     def send_telegram_notification(self, product_name, product_url, message):
         """Send Telegram notification to both personal and group chat if configured"""
+        telegram_message = (
+            f"🚨 *STOCK ALERT*\n\n"
+            f"✅ *{product_name}* is now available!\n\n"
+            f"🛒 [Buy Now]({product_url})\n"
+            f"📦 Status: {message}\n"
+            f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        )
+        return self._post_telegram(telegram_message, product_name)
+
+    def send_telegram_digest(self, alerts):
+        """Send one Telegram message listing every product that came back in stock this cycle"""
+        items = "".join(
+            f"• *{product_name}* — [Buy Now]({product_url})\n"
+            for product_name, product_url, _ in alerts
+        )
+        telegram_message = (
+            f"🚨 *STOCK ALERT*\n\n"
+            f"✅ {len(alerts)} products are now available!\n\n"
+            f"{items}\n"
+            f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        )
+        return self._post_telegram(telegram_message, f"{len(alerts)} products")
+
+    def _post_telegram(self, telegram_message, description):
+        """Post a Markdown message to the personal and group chats concurrently"""
         bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
         chat_id = os.getenv("TELEGRAM_CHAT_ID")      # Your personal Telegram user ID
         group_id = os.getenv("TELEGRAM_GROUP_ID")    # The group's chat ID (usually starts with -)
@@ -285,17 +834,9 @@ class StockMonitor:
             return False
 
         try:
-            telegram_message = (
-                f"🚨 *STOCK ALERT*\n\n"
-                f"✅ *{product_name}* is now available!\n\n"
-                f"🛒 [Buy Now]({product_url})\n"
-                f"📦 Status: {message}\n"
-                f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            )
-
             url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
 
-            for target_chat_id in [chat_id, group_id]:
+            def post(target_chat_id):
                 data = {
                     "chat_id": target_chat_id,
                     "text": telegram_message,
@@ -303,9 +844,13 @@ class StockMonitor:
                     "disable_web_page_preview": False
                 }
 
-                response = requests.post(url, data=data, timeout=10)
+                response = self.session.post(url, data=data, timeout=10)
                 response.raise_for_status()
-                self.logger.info(f"Telegram notification sent to chat_id {target_chat_id} for {product_name}")
+                self.logger.info(f"Telegram notification sent to chat_id {target_chat_id} for {description}")
+
+            futures = [self._notify_executor.submit(post, target) for target in [chat_id, group_id]]
+            for future in futures:
+                future.result()
 
             return True
 
@@ -313,64 +858,41 @@ class StockMonitor:
             self.logger.error(f"Failed to send Telegram notification: {str(e)}")
             return False
 
+    def flush_alerts(self):
+        """Send this cycle's alerts (as a digest if several), returning those delivered"""
+        alerts, self._pending_alerts = self._pending_alerts, []
+        if not alerts:
+            return []
+
+        if len(alerts) == 1:
+            # delivered = self.send_notification(*alerts[0])
+            delivered = self.send_telegram_notification(*alerts[0])
+        else:
+            # delivered = self.send_digest_notification(alerts)
+            delivered = self.send_telegram_digest(alerts)
+
+        return alerts if delivered else []
+
     def run_single_check(self):
         """Run a single check cycle (useful for cron jobs)"""
         self.logger.info("Starting single stock check...")
         
         try:
-            for product in self.config['products']:
-                product_name = product['name']
-                self.logger.info(f"Checking {product_name}...")
-                
-                is_in_stock, message = self.check_stock_status(product)
-                
-                if is_in_stock is None:
-                    continue
-                
-                if is_in_stock:
-                    self.logger.info(f"ALERT: {product_name} is IN STOCK!")
-                    # self.send_notification(product_name, product['url'], message)
-                    self.send_telegram_notification(product_name, product['url'], message)
-                else:
-                    self.logger.info(f"WAITING: {product_name} is out of stock")
-                
-                time.sleep(2)
-                
+            # Only alert on products that were not already in stock at the previous run
+            self.report_results(self.check_products(self.config['products']))
+
         except Exception as e:
             self.logger.error(f"Unexpected error during check: {str(e)}")
         finally:
-            if self.driver:
-                self.driver.quit()
-                self.logger.info("Browser closed")
+            self.close()
 
     def monitor_products(self):
         """Main monitoring loop for continuous operation"""
         self.logger.info("Starting continuous stock monitor...")
-        last_status = {}
         
         while True:
             try:
-                for product in self.config['products']:
-                    product_name = product['name']
-                    self.logger.info(f"Checking {product_name}...")
-                    
-                    is_in_stock, message = self.check_stock_status(product)
-                    
-                    if is_in_stock is None:
-                        continue
-                    
-                    # Check if status changed from out of stock to in stock
-                    if is_in_stock and last_status.get(product_name) in [None, False]:
-                        self.logger.info(f"ALERT: {product_name} is NOW IN STOCK!")
-                        # self.send_notification(product_name, product['url'], message)
-                        self.send_telegram_notification(product_name, product['url'], message)
-                    elif is_in_stock:
-                        self.logger.info(f"OK: {product_name} is in stock")
-                    else:
-                        self.logger.info(f"WAITING: {product_name} is out of stock")
-                    
-                    last_status[product_name] = is_in_stock
-                    time.sleep(2)
+                self.report_results(self.check_products(self.config['products']))
                 
                 self.logger.info(f"Waiting {self.config['check_interval']} seconds before next check...")
                 time.sleep(self.config['check_interval'])
@@ -382,8 +904,83 @@ class StockMonitor:
                 self.logger.error(f"Unexpected error: {str(e)}")
                 time.sleep(60)
         
+        self.close()
+
+    async def monitor_products_async(self):
+        """Monitoring loop for continuous operation with HTTP checks on asyncio + httpx"""
+        import httpx
+
+        self.logger.info("Starting continuous stock monitor (async)...")
+
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            self.logger.warning("h2 is not installed, falling back to HTTP/1.1")
+            http2 = False
+
+        try:
+            async with httpx.AsyncClient(
+                http2=http2,
+                # Match requests, which follows redirects by default
+                follow_redirects=True,
+                headers=dict(self.session.headers),
+                timeout=httpx.Timeout(7, connect=3),
+                limits=httpx.Limits(max_keepalive_connections=32)
+            ) as client:
+                while True:
+                    try:
+                        results = await self.check_products_async(self.config['products'], client)
+                        # Notifications are blocking calls; keep them off the event loop
+                        await asyncio.to_thread(self.report_results, results)
+
+                        self.logger.info(f"Waiting {self.config['check_interval']} seconds before next check...")
+                        await asyncio.sleep(self.config['check_interval'])
+
+                    except Exception as e:
+                        self.logger.error(f"Unexpected error: {str(e)}")
+                        await asyncio.sleep(60)
+        finally:
+            self.close()
+
+    def report_results(self, results):
+        """Log check results, alert on products that came back in stock and persist state"""
+        for product, is_in_stock, message in results:
+            product_name = product['name']
+
+            if is_in_stock is None:
+                continue
+
+            # Check if status changed from out of stock to in stock
+            if is_in_stock and self.last_status.get(product_name) in [None, False]:
+                self.logger.info(f"ALERT: {product_name} is NOW IN STOCK!")
+                # Recorded as in stock only once the alert has been delivered,
+                # so a failed notification is retried on the next check
+                self._pending_alerts.append((product_name, product['url'], message))
+                continue
+            elif is_in_stock:
+                self.logger.info(f"OK: {product_name} is in stock")
+            else:
+                self.logger.info(f"WAITING: {product_name} is out of stock")
+
+            self.last_status[product_name] = is_in_stock
+            self.save_state()
+
+        delivered = self.flush_alerts()
+        for product_name, _, _ in delivered:
+            self.last_status[product_name] = True
+        if delivered:
+            self.save_state()
+
+    def close(self):
+        """Release the browser, HTTP session and notification connections"""
         if self.driver:
             self.driver.quit()
+            self.driver = None
+            self.logger.info("Browser closed")
+        self._notify_executor.shutdown(wait=True)
+        self.close_smtp()
+        self.session.close()
 
 if __name__ == "__main__":
     # Check if running as a single check (for cron/scheduled jobs)
@@ -392,4 +989,16 @@ if __name__ == "__main__":
         monitor.run_single_check()
     else:
         monitor = StockMonitor()
-        monitor.monitor_products()
\ No newline at end of file
+        use_async = os.getenv("ASYNC_MONITOR", "true").lower() == "true"
+        if use_async and importlib.util.find_spec("httpx") is None:
+            monitor.logger.warning("httpx is not installed, falling back to the threaded monitor")
+            use_async = False
+
+        if use_async:
+            try:
+                asyncio.run(monitor.monitor_products_async())
+            except KeyboardInterrupt:
+                monitor.logger.info("Monitor stopped by user")
+        else:
+            # Threaded requests-based loop, for environments without httpx
+            monitor.monitor_products()
\ No newline at end of file
@@ -0,0 +1,78 @@
+import pytest
+
+from amul_stock_monitor import StockMonitor, _MAX_PAGE_BYTES
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    monkeypatch.setenv("STATE_FILE", str(tmp_path / "state.json"))
+    monitor = StockMonitor(str(tmp_path / "missing_config.json"))
+    yield monitor
+    monitor.close()
+
+
+def chunked(page, size):
+    return [page[i:i + size] for i in range(0, len(page), size)]
+
+
+SOLD_OUT_PAGE = b'<html><body><div class="alert alert-danger mt-3">Sold Out</div></body></html>'
+
+
+def test_sold_out_alert_in_single_chunk(monitor):
+    assert monitor.scan_page_for_alert([SOLD_OUT_PAGE])[0] is False
+
+
+@pytest.mark.parametrize("size", [1, 7, 20, 40])
+def test_sold_out_alert_split_across_chunks(monitor, size):
+    assert monitor.scan_page_for_alert(chunked(SOLD_OUT_PAGE, size))[0] is False
+
+
+def test_alert_split_after_large_prefix(monitor):
+    page = b'<html>' + b'x' * 20000 + SOLD_OUT_PAGE[6:]
+    split = page.index(b'danger')
+    assert monitor.scan_page_for_alert([page[:split], page[split:]])[0] is False
+
+
+def test_stops_reading_once_sold_out_alert_is_seen(monitor):
+    def chunks():
+        yield SOLD_OUT_PAGE
+        raise AssertionError("read past the sold-out alert")
+
+    assert monitor.scan_page_for_alert(chunks())[0] is False
+
+
+def test_no_alert_is_in_stock(monitor):
+    page = b'<html><body>' + b'x' * 50000 + b'</body></html>'
+    assert monitor.scan_page_for_alert(chunked(page, 8192))[0] is True
+
+
+def test_alert_without_sold_out_text_is_in_stock(monitor):
+    page = b'<html><div class="alert alert-danger mt-3">Limited stock</div></html>'
+    assert monitor.scan_page_for_alert([page])[0] is True
+
+
+def test_pattern_miss_falls_back_to_html_parser(monitor):
+    # The nested tag defeats the byte pattern; lxml still finds the alert text
+    page = b'<html><div class="alert alert-danger mt-3"><span>Sold Out</span></div></html>'
+    assert monitor.scan_page_for_alert(chunked(page, 16))[0] is False
+
+
+def test_text_after_alert_is_not_matched(monitor):
+    page = b'<html><div class="alert alert-danger mt-3"><b>Hurry</b></div> Sold out soon</html>'
+    assert monitor.scan_page_for_alert([page])[0] is True
+
+
+def test_truncated_page_without_alert_is_undetermined(monitor):
+    page = b'<html>' + b'x' * (_MAX_PAGE_BYTES + 8192) + SOLD_OUT_PAGE[6:]
+    assert monitor.scan_page_for_alert(chunked(page, 8192))[0] is None
+
+
+def test_truncated_page_with_sold_out_alert_is_sold_out(monitor):
+    page = (b'<html><div class="alert alert-danger mt-3"><span>Sold Out</span></div>'
+            + b'x' * (_MAX_PAGE_BYTES + 8192))
+    assert monitor.scan_page_for_alert(chunked(page, 8192))[0] is False
+
+
+def test_undetermined_verdict_is_not_cached(monitor):
+    monitor.remember_validators('https://example.com/p', {'ETag': '"e"'}, (None, "undetermined"))
+    assert 'https://example.com/p' not in monitor._http_cache